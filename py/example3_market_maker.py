@@ -1,27 +1,29 @@
-import datetime
 import logging
-import os
-import sys
-import time
 from dataclasses import dataclass
 from decimal import Decimal
-from os.path import getmtime
+from typing import List
 
+from pydantic import BaseModel
 from tenacity import retry, wait_fixed, stop_after_delay, stop_after_attempt
 
 from mango_service_v3_py.api import MangoServiceV3Client
+from mango_service_v3_py.config import HotReloadConfig
 from mango_service_v3_py.dtos import Side, PlaceOrder
+from mango_service_v3_py.indicators import IndicatorEngine
+from mango_service_v3_py.profiling import CycleProfiler
+from mango_service_v3_py.trade_tape import TradeTape
+from mango_service_v3_py.kill_switch import KillSwitch
+from mango_service_v3_py.ladder import (
+    GeometricSpacing,
+    LinearSize,
+    VolatilitySpacing,
+    generate_ladders_for_markets,
+)
 
 # based on https://github.com/BitMEX/sample-market-maker/blob/master/market_maker/market_maker.py
 
-CYCLE_INTERVAL = 30
-MARKET = "BTC-PERP"
-SIZE = 0.0003
-MAX_LONG_POSITION = 0.002
-MAX_SHORT_POSITION = -0.002
-MAX_ORDERS = 4
-
-watched_files_mtimes = [(f, getmtime(f)) for f in ["example3_market_maker.py"]]
+# parameters are hot reloaded from this file between cycles, no restart needed
+PARAMETERS_FILE = "example3_market_maker.json"
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-2s %(message)s",
@@ -31,6 +33,21 @@ logging.basicConfig(
 logger = logging.getLogger("simple_market_maker")
 
 
+class MarketMakerParameters(BaseModel):
+    cycle_interval: float = 30
+    market: str = "BTC-PERP"
+    size: float = 0.0003
+    max_long_position: float = 0.002
+    max_short_position: float = -0.002
+    max_buy_orders: int = 2
+    max_sell_orders: int = 4
+    # when > 0, levels are spaced by this multiple of the live 1 minute volatility
+    volatility_spacing_multiplier: float = 0
+    # per stage timings and optional stack sampling, written to profile.folded
+    profiling: bool = False
+    profiling_sampling: bool = False
+
+
 @dataclass
 class SimpleOrder:
     price: float
@@ -38,17 +55,18 @@ class SimpleOrder:
     size: float
 
 
-def toNearest(num, tickDec):
-    return Decimal(round(num / tickDec, 0)) * tickDec
-
-
 class MM:
     def __init__(self):
         self.mango_service_v3_client = MangoServiceV3Client()
+        self.config = HotReloadConfig(PARAMETERS_FILE, MarketMakerParameters)
+        # snapshot of the parameters, only swapped between cycles
+        self.params = self.config.params
         self.market = None
-        self.start_position_buy = None
-        self.start_position_sell = None
         self.positions = None
+        # fed from the trades fetched every cycle, costs no extra requests
+        self.indicators = IndicatorEngine()
+        self.trade_tape = TradeTape()
+        self.profiler = CycleProfiler()
 
     # todo unused
     @retry(stop=(stop_after_delay(10) | stop_after_attempt(5)), wait=wait_fixed(5))
@@ -56,13 +74,12 @@ class MM:
         getattr(self.mango_service_v3_client, mango_service_v3_client_method)(arg)
 
     def log_recent_trades(self) -> None:
-        trades = self.mango_service_v3_client.get_trades(MARKET)
-        recent_trades = [
-            trade
-            for trade in trades
-            if datetime.datetime.now((datetime.timezone.utc)) - trade.time
-            < datetime.timedelta(seconds=CYCLE_INTERVAL)
-        ]
+        with self.profiler.stage("fetch_trades"):
+            trades = self.mango_service_v3_client.get_trades(self.params.market)
+        with self.profiler.stage("update_trades"):
+            self.indicators.update_trades(trades)
+            self.trade_tape.add_trades(trades)
+        recent_trades = self.trade_tape.recent_trades(self.params.cycle_interval)
         if recent_trades:
             # todo: should log only my recent trades
             logger.info("- recent trades")
@@ -73,69 +90,78 @@ class MM:
             logger.info("")
 
     def get_ticker(self):
-        self.market = self.mango_service_v3_client.get_market_by_market_name(MARKET)[0]
-        self.start_position_buy = self.market.bid - self.market.price_increment
-        self.start_position_sell = self.market.ask + self.market.price_increment
-
-        self.positions = [
-            position
-            for position in self.mango_service_v3_client.get_open_positions()
-            if position.future == MARKET
-        ]
-
-    def get_price_offset(self, index):
-        start_position = (
-            self.start_position_buy if index < 0 else self.start_position_sell
-        )
-        index = index + 1 if index < 0 else index - 1
-        return toNearest(
-            Decimal(start_position) * Decimal(1 + self.market.price_increment) ** index,
-            Decimal(str(self.market.price_increment)),
+        with self.profiler.stage("fetch_ticker"):
+            self.market = self.mango_service_v3_client.get_market_by_market_name(
+                self.params.market
+            )[0]
+
+        with self.profiler.stage("fetch_positions"):
+            self.positions = [
+                position
+                for position in self.mango_service_v3_client.get_open_positions()
+                if position.future == self.params.market
+            ]
+
+    def prepare_orders(self) -> List[SimpleOrder]:
+        volatility = self.indicators.volatility.value
+        if self.params.volatility_spacing_multiplier > 0 and volatility:
+            spacing = VolatilitySpacing(
+                volatility, self.params.volatility_spacing_multiplier
+            )
+        else:
+            spacing = GeometricSpacing(self.market.price_increment)
+        ladder = generate_ladders_for_markets(
+            [self.market],
+            spacing,
+            LinearSize(self.params.size),
+            self.params.max_buy_orders,
+            self.params.max_sell_orders,
         )
-
-    def prepare_order(self, index) -> SimpleOrder:
-        size = Decimal(str(SIZE)) + ((abs(index) - 1) * Decimal(str(SIZE)))
-        price = self.get_price_offset(index)
-        return SimpleOrder(price=price, size=size, side="buy" if index < 0 else "sell")
+        return [
+            SimpleOrder(price=Decimal(str(price)), side=side, size=Decimal(str(size)))
+            for side, price, size in ladder.orders(self.params.market)
+        ]
 
     def converge_orders(self, buy_orders, sell_orders):
         to_create = []
         to_cancel = []
         buys_matched = 0
         sells_matched = 0
-        existing_orders = self.mango_service_v3_client.get_orders()
-
-        existing_orders = sorted(existing_orders, key=lambda order_: order_.price)
-        buy_orders = sorted(buy_orders, key=lambda order_: order_.price)
-        sell_orders = sorted(sell_orders, key=lambda order_: order_.price)
-
-        for order in existing_orders:
-            try:
-                if order.side == "buy":
-                    desired_order = buy_orders[buys_matched]
-                    buys_matched += 1
-                else:
-                    desired_order = sell_orders[sells_matched]
-                    sells_matched += 1
-
-                if desired_order.size != Decimal(str(order.size)) or (
-                    desired_order.price != Decimal(str(order.price))
-                    and abs((desired_order.price / Decimal(str(order.price))) - 1)
-                    > 0.01
-                ):
-                    to_cancel.append(order)
-                    to_create.append(desired_order)
+        with self.profiler.stage("fetch_orders"):
+            existing_orders = self.mango_service_v3_client.get_orders()
+
+        with self.profiler.stage("reconcile"):
+            existing_orders = sorted(existing_orders, key=lambda order_: order_.price)
+            buy_orders = sorted(buy_orders, key=lambda order_: order_.price)
+            sell_orders = sorted(sell_orders, key=lambda order_: order_.price)
 
-            except IndexError:
-                to_cancel.append(order)
+            for order in existing_orders:
+                try:
+                    if order.side == "buy":
+                        desired_order = buy_orders[buys_matched]
+                        buys_matched += 1
+                    else:
+                        desired_order = sell_orders[sells_matched]
+                        sells_matched += 1
+
+                    if desired_order.size != Decimal(str(order.size)) or (
+                        desired_order.price != Decimal(str(order.price))
+                        and abs((desired_order.price / Decimal(str(order.price))) - 1)
+                        > 0.01
+                    ):
+                        to_cancel.append(order)
+                        to_create.append(desired_order)
+
+                except IndexError:
+                    to_cancel.append(order)
 
-        while buys_matched < len(buy_orders):
-            to_create.append(buy_orders[buys_matched])
-            buys_matched += 1
+            while buys_matched < len(buy_orders):
+                to_create.append(buy_orders[buys_matched])
+                buys_matched += 1
 
-        while sells_matched < len(sell_orders):
-            to_create.append(sell_orders[sells_matched])
-            sells_matched += 1
+            while sells_matched < len(sell_orders):
+                to_create.append(sell_orders[sells_matched])
+                sells_matched += 1
 
         if len(to_cancel) > 0:
             logger.info(f"- cancelling {len(to_cancel)} orders...")
@@ -143,11 +169,13 @@ class MM:
                 logger.info(
                     f" |_ side {order.side:4}, size {order.size}, price {order.price}, value {order.price * order.size}"
                 )
-            for order in to_cancel:
-                try:
-                    self.mango_service_v3_client.cancel_order_by_order_id(order.id)
-                except:
-                    pass
+            with self.profiler.stage("cancel"):
+                for order in to_cancel:
+                    # e.g. already filled, one failed cancel must not stop the rest
+                    try:
+                        self.mango_service_v3_client.cancel_order_by_order_id(order.id)
+                    except Exception as e:
+                        logger.warning(f"cancelling order {order.id} failed: {e}")
             logger.info("")
         else:
             logger.info("- no orders to cancel")
@@ -177,20 +205,21 @@ class MM:
                 logger.info(
                     f" |_ price {order.price}, side {order.side:4}, size {order.size}, value {order.price * order.size}"
                 )
-            for order in to_create:
-                self.mango_service_v3_client.place_order(
-                    PlaceOrder(
-                        market=MARKET,
-                        side=order.side,
-                        price=order.price,
-                        type="limit",
-                        size=order.size,
-                        reduce_only=False,
-                        ioc=False,
-                        post_only=False,
-                        client_id=123,
+            with self.profiler.stage("place"):
+                for order in to_create:
+                    self.mango_service_v3_client.place_order(
+                        PlaceOrder(
+                            market=self.params.market,
+                            side=order.side,
+                            price=order.price,
+                            type="limit",
+                            size=order.size,
+                            reduce_only=False,
+                            ioc=False,
+                            post_only=False,
+                            client_id=123,
+                        )
                     )
-                )
             logger.info("")
         else:
             logger.info("- no orders to create, current open orders")
@@ -204,26 +233,26 @@ class MM:
     def long_position_limit_exceeded(self):
         if len(self.positions) == 0:
             return False
-        return self.positions[0].net_size >= MAX_LONG_POSITION
+        return self.positions[0].net_size >= self.params.max_long_position
 
     def short_position_limit_exceeded(self):
         if len(self.positions) == 0:
             return False
-        return self.positions[0].net_size <= MAX_SHORT_POSITION
+        return self.positions[0].net_size <= self.params.max_short_position
 
     def place_orders(self):
         buy_orders = []
         sell_orders = []
+        with self.profiler.stage("prepare"):
+            orders = self.prepare_orders()
         if not self.long_position_limit_exceeded():
-            for i in reversed(range(1, 2 + 1)):
-                buy_orders.append(self.prepare_order(-i))
+            buy_orders = [order for order in orders if order.side == "buy"]
         else:
             logger.info(
                 f"- skipping adding to longs, current position {self.positions[0].net_size}"
             )
         if not self.short_position_limit_exceeded():
-            for i in reversed(range(1, MAX_ORDERS + 1)):
-                sell_orders.append(self.prepare_order(i))
+            sell_orders = [order for order in orders if order.side == "sell"]
         else:
             logger.info(
                 f"- skipping adding to shorts, current position {self.positions[0].net_size}"
@@ -231,20 +260,27 @@ class MM:
 
         return self.converge_orders(buy_orders, sell_orders)
 
-    def check_file_change(self):
-        for f, mtime in watched_files_mtimes:
-            if getmtime(f) > mtime:
-                self.restart()
+    def start_cycle(self):
+        if self.params is not self.config.params:
+            logger.info(f"- applying new parameters {self.config.params}")
+            if self.config.params.market != self.params.market:
+                self.mango_service_v3_client.cancel_all_orders()
+                self.indicators = IndicatorEngine()
+                self.trade_tape = TradeTape()
+        self.params = self.config.params
+        self.profiler.configure(self.params.profiling, self.params.profiling_sampling)
 
-    def restart(self):
-        logger.info("------------------------------")
-        logger.info("restarting the market maker...")
-        os.execv(sys.executable, [sys.executable] + sys.argv)
+    def sleep(self):
+        self.config.sleep(self.params.cycle_interval)
 
 
 if __name__ == "__main__":
 
     mm = MM()
+    # flatten all orders within a bounded time when the process is asked to stop
+    kill_switch = KillSwitch(mm.mango_service_v3_client)
+    kill_switch.install_signal_handler()
+
     logger.info("cancelling all orders...")
 
     try:
@@ -255,13 +291,15 @@ if __name__ == "__main__":
     while True:
         logger.info("next cycle...")
         try:
-            mm.check_file_change()
+            mm.start_cycle()
             mm.log_recent_trades()
             mm.get_ticker()
             mm.place_orders()
-            time.sleep(CYCLE_INTERVAL)
+            mm.profiler.end_cycle()
+            mm.sleep()
             logger.info("")
         except Exception as e:
             logger.error(f"Exception: {e}")
-            time.sleep(CYCLE_INTERVAL)
+            mm.profiler.end_cycle()
+            mm.sleep()
             logger.info("")
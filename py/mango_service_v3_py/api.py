@@ -42,33 +42,33 @@ class MangoServiceV3Client:
 
     def get_open_positions(self) -> List[Position]:
         response = httpx.get(f"{self.BASE_URL}/positions", timeout=self.timeout)
-        return parse_obj_as(List[Position], json.loads(response.text)["result"])
+        return parse_obj_as(List[Position], self._result(response))
 
     def get_balances(self) -> List[Balance]:
         response = httpx.get(f"{self.BASE_URL}/wallet/balances", timeout=self.timeout)
-        return parse_obj_as(List[Balance], json.loads(response.text)["result"])
+        return parse_obj_as(List[Balance], self._result(response))
 
     def get_markets(self) -> List[Market]:
         response = httpx.get(f"{self.BASE_URL}/markets", timeout=self.timeout)
-        return parse_obj_as(List[Market], json.loads(response.text)["result"])
+        return parse_obj_as(List[Market], self._result(response))
 
     def get_market_by_market_name(self, market_name: str) -> List[Market]:
         response = httpx.get(
             f"{self.BASE_URL}/markets/{market_name}", timeout=self.timeout
         )
-        return parse_obj_as(List[Market], json.loads(response.text)["result"])
+        return parse_obj_as(List[Market], self._result(response))
 
     def get_orderbook(self, market_name: str, depth: int = 30) -> Orderbook:
         response = httpx.get(
             f"{self.BASE_URL}/markets/{market_name}/orderbook?depth={depth}"
         )
-        return parse_obj_as(Orderbook, json.loads(response.text)["result"])
+        return parse_obj_as(Orderbook, self._result(response))
 
     def get_trades(self, market_name: str) -> List[Trade]:
         response = httpx.get(
             f"{self.BASE_URL}/markets/{market_name}/trades", timeout=self.timeout
         )
-        return parse_obj_as(List[Trade], json.loads(response.text)["result"])
+        return parse_obj_as(List[Trade], self._result(response))
 
     def get_candles(
         self, market_name: str, resolution: int, start_time: int, end_time: int
@@ -76,17 +76,17 @@ class MangoServiceV3Client:
         response = httpx.get(
             f"{self.BASE_URL}/markets/{market_name}/candles?resolution={resolution}&start_time={start_time}&end_time={end_time}"
         )
-        return parse_obj_as(List[Candle], json.loads(response.text)["result"])
+        return parse_obj_as(List[Candle], self._result(response))
 
     def get_orders(self,) -> List[Order]:
         response = httpx.get(f"{self.BASE_URL}/orders", timeout=self.timeout)
-        return parse_obj_as(List[Order], json.loads(response.text)["result"])
+        return parse_obj_as(List[Order], self._result(response))
 
     def get_orders_by_market_name(self, market_name: str) -> List[Order]:
         response = httpx.get(
             f"{self.BASE_URL}/orders?market={market_name}", timeout=self.timeout
         )
-        return parse_obj_as(List[Order], json.loads(response.text)["result"])
+        return parse_obj_as(List[Order], self._result(response))
 
     def place_order(self, order: PlaceOrder) -> None:
         response = httpx.post(
@@ -94,19 +94,29 @@ class MangoServiceV3Client:
             json=order.dict(by_alias=True),
             timeout=self.timeout,
         )
+        response.raise_for_status()
 
     def cancel_order_by_client_id(self, client_id):
         response = httpx.delete(
             f"{self.BASE_URL}/orders/by_client_id/{client_id}", timeout=self.timeout
         )
+        response.raise_for_status()
 
     def cancel_order_by_order_id(self, order_id):
         response = httpx.delete(
             f"{self.BASE_URL}/orders/{order_id}", timeout=self.timeout
         )
+        response.raise_for_status()
 
     def cancel_all_orders(self):
         response = httpx.delete(f"{self.BASE_URL}/orders", timeout=self.timeout)
+        response.raise_for_status()
+
+    @staticmethod
+    def _result(response: httpx.Response):
+        # raise with the status code, so that callers can tell 4xx from 5xx
+        response.raise_for_status()
+        return json.loads(response.text)["result"]
 
     @staticmethod
     def to_nearest(num, tickDec):
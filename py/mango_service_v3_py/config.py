@@ -0,0 +1,175 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Generic, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger("config")
+
+P = TypeVar("P", bound=BaseModel)
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Watches the directory of a file for writes and renames targeting the file, the
+    directory is watched rather than the file so that editors and tools which replace
+    the file atomically (write to temp file + rename) are picked up too.
+    """
+
+    def __init__(self, path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.file_name = os.path.basename(path).encode()
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.path.dirname(os.path.abspath(path)).encode()
+        # only complete writes, so a half written file is never loaded
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        return bool(readable) and self.changed()
+
+    def changed(self) -> bool:
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, name_length = _INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += _INOTIFY_EVENT.size
+                name = buffer[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+                if name == self.file_name:
+                    changed = True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, path: str, poll_interval: float = 1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_stat = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.changed():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def changed(self) -> bool:
+        stat = self._stat()
+        if stat != self.last_stat:
+            self.last_stat = stat
+            return True
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class HotReloadConfig(Generic[P]):
+    """
+    Holds strategy parameters loaded from a json file and swaps in a new parameters
+    object when the file changes. Reloads only happen when the caller asks for them,
+    i.e. between cycles, so a cycle never sees a half applied set of parameters.
+    """
+
+    def __init__(self, path: str, model: Type[P], poll_interval: float = 1.0):
+        self.path = path
+        self.model = model
+        self.last_reload_latency: Optional[float] = None
+        # no fallback to defaults at startup, trading them by accident is worse than
+        # not starting at all
+        self.params: P = self._parse()
+        self.watcher = self._create_watcher(poll_interval)
+
+    def _create_watcher(self, poll_interval: float):
+        if sys.platform.startswith("linux"):
+            try:
+                return InotifyWatcher(self.path)
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to polling: {e}")
+        return PollingWatcher(self.path, poll_interval)
+
+    def _parse(self) -> P:
+        with open(self.path) as f:
+            return self.model.parse_obj(json.load(f))
+
+    def _load(self) -> Optional[P]:
+        try:
+            return self._parse()
+        except FileNotFoundError:
+            logger.error(f"parameter file {self.path} not found")
+        except (ValueError, ValidationError) as e:
+            # includes json decode errors, keep the current parameters
+            logger.error(f"invalid parameter file {self.path}: {e}")
+        return None
+
+    def reload(self) -> bool:
+        params = self._load()
+        if params is None:
+            return False
+        try:
+            modified_at = os.stat(self.path).st_mtime
+            self.last_reload_latency = max(time.time() - modified_at, 0.0)
+        except FileNotFoundError:
+            self.last_reload_latency = None
+        self.params = params
+        logger.info(
+            f"reloaded parameters from {self.path} in {self.last_reload_latency:.3f}s: {params}"
+            if self.last_reload_latency is not None
+            else f"reloaded parameters from {self.path}: {params}"
+        )
+        return True
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleeps up to `seconds` but returns early with the new parameters applied as
+        soon as the parameter file changes, returns whether a reload happened.
+        """
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # an invalid file keeps the old parameters, so just keep sleeping
+            if self.watcher.wait(remaining) and self.reload():
+                return True
+
+    def close(self) -> None:
+        self.watcher.close()
@@ -0,0 +1,268 @@
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from mango_service_v3_py.dtos import Candle, Trade
+from mango_service_v3_py.ring_buffer import RingBuffer
+
+# candle times are epoch seconds, resolutions are in seconds
+
+
+class EMA:
+    def __init__(self, period: int):
+        self.alpha = 2 / (period + 1)
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> float:
+        self.value = (
+            value
+            if self.value is None
+            else self.alpha * value + (1 - self.alpha) * self.value
+        )
+        return self.value
+
+
+class RollingSum:
+    """
+    Sum over the last `window` values, O(1) per update. The sum is recomputed from
+    the buffer once per full window to stop floating point drift from accumulating.
+    """
+
+    def __init__(self, window: int):
+        self.values = RingBuffer(window)
+        self.sum = 0.0
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def update(self, value: float) -> float:
+        evicted = self.values.append(value)
+        self.sum += value - (evicted if evicted is not None else 0.0)
+        self.updates += 1
+        if self.updates % self.values.capacity == 0:
+            self.sum = float(self.values.values().sum())
+        return self.sum
+
+
+class ATR:
+    def __init__(self, period: int):
+        self.true_ranges = RollingSum(period)
+        self.previous_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, candle: Candle) -> float:
+        true_range = candle.high - candle.low
+        if self.previous_close is not None:
+            true_range = max(
+                true_range,
+                abs(candle.high - self.previous_close),
+                abs(candle.low - self.previous_close),
+            )
+        self.previous_close = candle.close
+        self.value = self.true_ranges.update(true_range) / len(self.true_ranges)
+        return self.value
+
+
+class RealizedVolatility:
+    # standard deviation of close to close log returns, per bar
+    def __init__(self, window: int):
+        self.returns = RollingSum(window)
+        self.squared_returns = RollingSum(window)
+        self.previous_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, candle: Candle) -> Optional[float]:
+        if self.previous_close is not None and self.previous_close > 0:
+            log_return = math.log(candle.close / self.previous_close)
+            total = self.returns.update(log_return)
+            squared_total = self.squared_returns.update(log_return ** 2)
+            n = len(self.returns)
+            variance = squared_total / n - (total / n) ** 2
+            self.value = math.sqrt(max(variance, 0.0))
+        self.previous_close = candle.close
+        return self.value
+
+
+class VWAP:
+    def __init__(self, window: int):
+        self.price_volume = RollingSum(window)
+        self.volume = RollingSum(window)
+        self.value: Optional[float] = None
+
+    def update(self, candle: Candle) -> Optional[float]:
+        typical_price = (candle.high + candle.low + candle.close) / 3
+        price_volume = self.price_volume.update(typical_price * candle.volume)
+        volume = self.volume.update(candle.volume)
+        if volume > 0:
+            self.value = price_volume / volume
+        return self.value
+
+
+class CandleResampler:
+    """
+    Aggregates candles into bars of a higher resolution, bars are emitted once a
+    candle of a later bucket arrives. Buckets without any candle are emitted as flat
+    bars at the previous close, so a quiet stretch isn't read as a single bar's move.
+    """
+
+    def __init__(self, resolution: int):
+        self.resolution = resolution
+        self.current: Optional[Candle] = None
+        # the current bar without the last candle, so that candle can be replaced
+        self.before_last: Optional[Candle] = None
+
+    @staticmethod
+    def _start(bucket: int, candle: Candle) -> Candle:
+        return Candle(
+            time=bucket,
+            open=candle.open,
+            high=candle.high,
+            low=candle.low,
+            close=candle.close,
+            volume=candle.volume,
+        )
+
+    @staticmethod
+    def _merge(bar: Candle, candle: Candle) -> Candle:
+        bar.high = max(bar.high, candle.high)
+        bar.low = min(bar.low, candle.low)
+        bar.close = candle.close
+        bar.volume += candle.volume
+        return bar
+
+    def update(self, candle: Candle) -> List[Candle]:
+        bucket = candle.time - candle.time % self.resolution
+        if self.current is not None and bucket < self.current.time:
+            # late candle of an already completed bucket
+            return []
+        if self.current is not None and bucket == self.current.time:
+            self.before_last = self.current.copy()
+            self._merge(self.current, candle)
+            return []
+
+        completed = []
+        if self.current is not None:
+            completed.append(self.current)
+            close = self.current.close
+            for empty in range(
+                self.current.time + self.resolution, bucket, self.resolution
+            ):
+                completed.append(
+                    Candle(
+                        time=empty,
+                        open=close,
+                        high=close,
+                        low=close,
+                        close=close,
+                        volume=0,
+                    )
+                )
+        self.before_last = None
+        self.current = self._start(bucket, candle)
+        return completed
+
+    def replace_last(self, candle: Candle) -> None:
+        # a newer version of the last candle, e.g. a minute which was still in progress
+        if self.before_last is None:
+            self.current = self._start(self.current.time, candle)
+        else:
+            self.current = self._merge(self.before_last.copy(), candle)
+
+
+class TradeBarBuilder:
+    # builds bars from individual trades, e.g. trades polled between candle fetches
+    def __init__(self, resolution: int = 60):
+        self.resampler = CandleResampler(resolution)
+
+    def update(self, trade: Trade) -> List[Candle]:
+        return self.resampler.update(
+            Candle(
+                time=int(trade.time.timestamp()),
+                open=trade.price,
+                high=trade.price,
+                low=trade.price,
+                close=trade.price,
+                volume=trade.size,
+            )
+        )
+
+
+class IndicatorEngine:
+    """
+    Keeps EMA, ATR, realized volatility and VWAP up to date over bars of
+    `resolution` seconds. Feed it 1 minute candles from get_candles and, in between
+    candle fetches, trades from get_trades. The latest minute replaces its previous
+    version when fed again, so the minute still in progress is updated until it is
+    complete; older minutes which were already seen are skipped, so both sources can
+    be mixed freely.
+    """
+
+    def __init__(
+        self,
+        resolution: int = 60,
+        ema_period: int = 20,
+        atr_period: int = 14,
+        volatility_window: int = 30,
+        vwap_window: int = 30,
+    ):
+        self.resampler = CandleResampler(resolution)
+        self.trade_bars = TradeBarBuilder(60)
+        self.last_minute: Optional[int] = None
+        self.last_trade_time: Optional[datetime] = None
+        # trades at last_trade_time already applied, fills of one order share an id
+        self.last_trade_keys: Counter = Counter()
+        self.ema = EMA(ema_period)
+        self.atr = ATR(atr_period)
+        self.volatility = RealizedVolatility(volatility_window)
+        self.vwap = VWAP(vwap_window)
+
+    def _on_minute(self, candle: Candle) -> None:
+        if self.last_minute is not None and candle.time < self.last_minute:
+            return
+        if candle.time == self.last_minute:
+            self.resampler.replace_last(candle)
+            return
+        self.last_minute = candle.time
+        for bar in self.resampler.update(candle):
+            self._on_bar(bar)
+
+    def _on_bar(self, bar: Candle) -> None:
+        self.ema.update(bar.close)
+        self.atr.update(bar)
+        self.volatility.update(bar)
+        self.vwap.update(bar)
+
+    def update_candles(self, candles: Iterable[Candle]) -> None:
+        for candle in sorted(candles, key=lambda candle_: candle_.time):
+            self._on_minute(candle)
+
+    def update_trades(self, trades: List[Trade]) -> None:
+        # get_trades returns the most recent trades, only new ones are applied. Trade
+        # ids are order ids, so new trades are found by time, and among those at the
+        # last applied time by comparing their contents
+        trades = sorted(trades, key=lambda trade_: trade_.time)
+        applied = Counter(self.last_trade_keys)
+        new_trades = []
+        for trade in trades:
+            if self.last_trade_time is not None:
+                if trade.time < self.last_trade_time:
+                    continue
+                if trade.time == self.last_trade_time and applied[_key(trade)] > 0:
+                    applied[_key(trade)] -= 1
+                    continue
+            new_trades.append(trade)
+
+        for trade in new_trades:
+            for bar in self.trade_bars.update(trade):
+                self._on_minute(bar)
+        if new_trades:
+            self.last_trade_time = new_trades[-1].time
+            self.last_trade_keys = Counter(
+                _key(trade) for trade in trades if trade.time == self.last_trade_time
+            )
+
+
+def _key(trade: Trade) -> Tuple[str, datetime, float, float]:
+    return trade.id, trade.time, trade.price, trade.size
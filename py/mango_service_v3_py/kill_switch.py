@@ -0,0 +1,215 @@
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import parse_obj_as
+
+from mango_service_v3_py.api import MangoServiceV3Client
+from mango_service_v3_py.dtos import Order
+
+logger = logging.getLogger("kill_switch")
+
+
+@dataclass
+class KillSwitchResult:
+    flattened: bool
+    used_fallback: bool
+    elapsed: float
+    remaining_orders: List[Order] = field(default_factory=list)
+
+
+class KillSwitch:
+    """
+    Cancels every open order as fast as possible.
+
+    A keep-alive connection to the service is opened and warmed up at construction
+    time, so triggering the switch does not pay for a fresh tcp handshake. The bulk
+    cancel is verified by polling /orders until it is empty; if the bulk cancel fails,
+    can't be verified or orders survive it, the remaining orders are cancelled by id,
+    one worker per market.
+    """
+
+    def __init__(
+        self,
+        mango_service_v3_client: Optional[MangoServiceV3Client] = None,
+        max_duration: float = 10.0,
+        poll_interval: float = 0.25,
+        max_workers: int = 8,
+        warm_connections: int = 4,
+        keep_warm_interval: Optional[float] = 3.0,
+    ):
+        self.mango_service_v3_client = (
+            mango_service_v3_client
+            if mango_service_v3_client
+            else MangoServiceV3Client()
+        )
+        self.max_duration = max_duration
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.warm_connections = min(warm_connections, max_workers)
+        self.http_client = httpx.Client(
+            base_url=self.mango_service_v3_client.BASE_URL,
+            timeout=self.mango_service_v3_client.timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=max_workers, keepalive_expiry=60.0
+            ),
+        )
+        self.warm_up_executor = ThreadPoolExecutor(max_workers=self.warm_connections)
+        self.warm_up()
+
+        # the service (node) closes idle keep-alive connections after 5s, so pooled
+        # connections have to be re-pinged well below that to still be open on trigger
+        self.stopped = threading.Event()
+        if keep_warm_interval:
+            threading.Thread(
+                target=self._keep_warm, args=(keep_warm_interval,), daemon=True
+            ).start()
+
+    def _ping(self) -> None:
+        try:
+            # cheap endpoint, served from config without touching the chain
+            self.http_client.get("/coins")
+        except httpx.HTTPError as e:
+            logger.warning(f"kill switch warm up failed: {e}")
+
+    def warm_up(self) -> None:
+        # concurrent requests, so that several pooled connections are opened and the
+        # per market fallback workers don't start on cold ones
+        futures = [
+            self.warm_up_executor.submit(self._ping)
+            for _ in range(self.warm_connections)
+        ]
+        wait(futures)
+
+    def _keep_warm(self, interval: float) -> None:
+        while not self.stopped.wait(interval):
+            self.warm_up()
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.warm_up_executor.shutdown(wait=False)
+        self.http_client.close()
+
+    def get_orders(self, deadline: float) -> Optional[List[Order]]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            response = self.http_client.get("/orders", timeout=remaining)
+            response.raise_for_status()
+            return parse_obj_as(List[Order], json.loads(response.text)["result"])
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            # ValueError covers malformed json and pydantic validation errors
+            logger.error(f"fetching orders failed: {e}")
+            return None
+
+    def cancel_all_orders(self, timeout: float) -> bool:
+        try:
+            response = self.http_client.delete("/orders", timeout=timeout)
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            logger.error(f"bulk cancel failed: {e}")
+            return False
+
+    def cancel_orders_per_market(self, orders: List[Order], deadline: float) -> None:
+        orders_by_market: Dict[str, List[Order]] = defaultdict(list)
+        for order in orders:
+            orders_by_market[order.market].append(order)
+
+        def cancel_market(market_orders: List[Order]) -> None:
+            for order in market_orders:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    self.http_client.delete(f"/orders/{order.id}", timeout=remaining)
+                except httpx.HTTPError as e:
+                    logger.error(f"cancelling order {order.id} failed: {e}")
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, max(len(orders_by_market), 1))
+        )
+        futures = [
+            executor.submit(cancel_market, market_orders)
+            for market_orders in orders_by_market.values()
+        ]
+        wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        # don't block on stragglers, the deadline is a hard bound
+        executor.shutdown(wait=False)
+
+    def wait_until_flat(self, deadline: float) -> Optional[List[Order]]:
+        # None means /orders could not be fetched at all, i.e. state is unknown
+        orders = None
+        while time.monotonic() < deadline:
+            polled = self.get_orders(deadline)
+            if polled is not None:
+                orders = polled
+                if not orders:
+                    return orders
+            time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+        return orders
+
+    def get_orders_until_known(self, deadline: float) -> Optional[List[Order]]:
+        # retry while the state is unknown, any answer is enough to act on
+        orders = self.get_orders(deadline)
+        while orders is None and time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+            orders = self.get_orders(deadline)
+        return orders
+
+    def trigger(self) -> KillSwitchResult:
+        start = time.monotonic()
+        deadline = start + self.max_duration
+        # give the bulk cancel at most half the budget, keep the rest for the fallback
+        bulk_deadline = start + self.max_duration / 2
+        used_fallback = False
+
+        remaining_orders = None
+        if self.cancel_all_orders(timeout=bulk_deadline - start):
+            remaining_orders = self.wait_until_flat(bulk_deadline)
+        if remaining_orders is None:
+            # the bulk cancel failed or couldn't be verified, find out what is left
+            # to cancel with the rest of the budget
+            remaining_orders = self.get_orders_until_known(deadline)
+
+        if remaining_orders:
+            used_fallback = True
+            logger.info(
+                f"falling back to per market cancel for {len(remaining_orders)} orders"
+            )
+            self.cancel_orders_per_market(remaining_orders, deadline)
+            remaining_orders = self.wait_until_flat(deadline)
+
+        elapsed = time.monotonic() - start
+        result = KillSwitchResult(
+            flattened=remaining_orders == [],
+            used_fallback=used_fallback,
+            elapsed=elapsed,
+            remaining_orders=remaining_orders or [],
+        )
+        if result.flattened:
+            logger.info(f"kill switch flattened all orders in {elapsed:.3f}s")
+        else:
+            logger.error(
+                f"kill switch could not verify all orders cancelled after {elapsed:.3f}s, "
+                f"{len(result.remaining_orders)} known open"
+            )
+        return result
+
+    def install_signal_handler(self, signals=(signal.SIGTERM,), exit_code: int = 1):
+        def handler(signum, frame):
+            logger.info(f"received signal {signum}, triggering kill switch...")
+            result = self.trigger()
+            sys.exit(0 if result.flattened else exit_code)
+
+        for signum in signals:
+            signal.signal(signum, handler)
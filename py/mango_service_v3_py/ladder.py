@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from mango_service_v3_py.dtos import Candle, Market, Side
+
+# prices and sizes are laid out as (markets, levels), level 0 is closest to the touch
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def realized_volatility(candles: List[Candle]) -> float:
+    closes = np.array([candle.close for candle in candles], dtype=np.float64)
+    if len(closes) < 2:
+        return 0.0
+    return float(np.std(np.diff(np.log(closes))))
+
+
+class GeometricSpacing:
+    def __init__(self, increment: ArrayLike):
+        self.increment = increment
+
+    def prices(self, starts: np.ndarray, levels: int, sign: int) -> np.ndarray:
+        increment = np.reshape(np.asarray(self.increment, dtype=np.float64), (-1, 1))
+        exponents = sign * np.arange(levels, dtype=np.float64)
+        return starts[:, None] * (1 + increment) ** exponents
+
+
+class LinearSpacing:
+    def __init__(self, step: ArrayLike):
+        self.step = step
+
+    def prices(self, starts: np.ndarray, levels: int, sign: int) -> np.ndarray:
+        step = np.reshape(np.asarray(self.step, dtype=np.float64), (-1, 1))
+        return starts[:, None] + sign * step * np.arange(levels, dtype=np.float64)
+
+
+class VolatilitySpacing:
+    """
+    Spaces levels by a multiple of the realized volatility (std of close to close
+    log returns), i.e. step = start * multiplier * volatility.
+    """
+
+    def __init__(self, volatility: ArrayLike, multiplier: float = 1.0):
+        self.volatility = volatility
+        self.multiplier = multiplier
+
+    @classmethod
+    def from_candles(
+        cls, candles_per_market: List[List[Candle]], multiplier: float = 1.0
+    ) -> "VolatilitySpacing":
+        return cls(
+            [realized_volatility(candles) for candles in candles_per_market],
+            multiplier,
+        )
+
+    def prices(self, starts: np.ndarray, levels: int, sign: int) -> np.ndarray:
+        volatility = np.reshape(np.asarray(self.volatility, dtype=np.float64), (-1, 1))
+        step = starts[:, None] * self.multiplier * volatility
+        return starts[:, None] + sign * step * np.arange(levels, dtype=np.float64)
+
+
+class ConstantSize:
+    def __init__(self, size: ArrayLike):
+        self.size = size
+
+    def sizes(self, n_markets: int, levels: int) -> np.ndarray:
+        size = np.reshape(np.asarray(self.size, dtype=np.float64), (-1, 1))
+        return np.broadcast_to(size, (n_markets, levels)).copy()
+
+
+class LinearSize:
+    def __init__(self, size: ArrayLike):
+        self.size = size
+
+    def sizes(self, n_markets: int, levels: int) -> np.ndarray:
+        size = np.reshape(np.asarray(self.size, dtype=np.float64), (-1, 1))
+        return np.broadcast_to(
+            size * np.arange(1, levels + 1, dtype=np.float64), (n_markets, levels)
+        ).copy()
+
+
+class GeometricSize:
+    def __init__(self, size: ArrayLike, ratio: float):
+        self.size = size
+        self.ratio = ratio
+
+    def sizes(self, n_markets: int, levels: int) -> np.ndarray:
+        size = np.reshape(np.asarray(self.size, dtype=np.float64), (-1, 1))
+        return np.broadcast_to(
+            size * self.ratio ** np.arange(levels, dtype=np.float64),
+            (n_markets, levels),
+        ).copy()
+
+
+def decimals(increments: np.ndarray) -> np.ndarray:
+    # decimal places of each increment, e.g. 0.25 -> 2, 2.5 -> 1, 0.0025 -> 4
+    return np.array(
+        [
+            max(0, -Decimal(str(increment)).as_tuple().exponent)
+            for increment in increments
+        ]
+    )
+
+
+def snap(values: np.ndarray, increments: np.ndarray) -> np.ndarray:
+    increments = np.asarray(increments, dtype=np.float64)
+    ticks = np.round(values / increments[:, None])
+    # strip float noise e.g. 0.30000000000000004 -> 0.3, the increment's own decimal
+    # places are exact for any value on its grid
+    scale = 10.0 ** decimals(increments)[:, None]
+    return np.round(ticks * increments[:, None] * scale) / scale
+
+
+def spread_levels(prices: np.ndarray, increments: np.ndarray, sign: int) -> np.ndarray:
+    """
+    Makes every level at least one tick further from the touch than the previous
+    one, spacing models with a step below one tick would otherwise snap several
+    levels onto the same price.
+    """
+    offsets = np.arange(prices.shape[1], dtype=np.float64) * increments[:, None]
+    if sign > 0:
+        return np.maximum.accumulate(prices - offsets, axis=1) + offsets
+    return np.minimum.accumulate(prices + offsets, axis=1) - offsets
+
+
+@dataclass
+class Ladder:
+    markets: List[str]
+    bid_prices: np.ndarray
+    bid_sizes: np.ndarray
+    ask_prices: np.ndarray
+    ask_sizes: np.ndarray
+
+    def orders(self, market: str) -> List[Tuple[Side, float, float]]:
+        i = self.markets.index(market)
+        bids = [
+            ("buy", float(price), float(size))
+            for price, size in zip(self.bid_prices[i], self.bid_sizes[i])
+            if size > 0
+        ]
+        asks = [
+            ("sell", float(price), float(size))
+            for price, size in zip(self.ask_prices[i], self.ask_sizes[i])
+            if size > 0
+        ]
+        return bids + asks
+
+
+def generate_ladders(
+    markets: List[str],
+    bid_starts: ArrayLike,
+    ask_starts: ArrayLike,
+    price_increments: ArrayLike,
+    size_increments: ArrayLike,
+    spacing,
+    size_curve,
+    bid_levels: int,
+    ask_levels: int,
+) -> Ladder:
+    bid_starts = np.asarray(bid_starts, dtype=np.float64)
+    ask_starts = np.asarray(ask_starts, dtype=np.float64)
+    price_increments = np.asarray(price_increments, dtype=np.float64)
+    size_increments = np.asarray(size_increments, dtype=np.float64)
+    n_markets = len(markets)
+
+    bid_prices = snap(
+        spread_levels(
+            snap(spacing.prices(bid_starts, bid_levels, -1), price_increments),
+            price_increments,
+            -1,
+        ),
+        price_increments,
+    )
+    ask_prices = snap(
+        spread_levels(
+            snap(spacing.prices(ask_starts, ask_levels, 1), price_increments),
+            price_increments,
+            1,
+        ),
+        price_increments,
+    )
+    bid_sizes = snap(size_curve.sizes(n_markets, bid_levels), size_increments)
+    ask_sizes = snap(size_curve.sizes(n_markets, ask_levels), size_increments)
+
+    # levels rounded below the minimum size are not quoted
+    bid_sizes[bid_sizes < size_increments[:, None]] = 0
+    ask_sizes[ask_sizes < size_increments[:, None]] = 0
+
+    return Ladder(markets, bid_prices, bid_sizes, ask_prices, ask_sizes)
+
+
+def generate_ladders_for_markets(
+    markets: List[Market], spacing, size_curve, bid_levels: int, ask_levels: int
+) -> Ladder:
+    # start one tick outside of the current best bid and ask
+    price_increments = np.array([market.price_increment for market in markets])
+    return generate_ladders(
+        [market.name for market in markets],
+        np.array([market.bid for market in markets], dtype=np.float64)
+        - price_increments,
+        np.array([market.ask for market in markets], dtype=np.float64)
+        + price_increments,
+        price_increments,
+        [market.size_increment for market in markets],
+        spacing,
+        size_curve,
+        bid_levels,
+        ask_levels,
+    )
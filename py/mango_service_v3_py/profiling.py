@@ -0,0 +1,181 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging.handlers import RotatingFileHandler
+from types import CodeType
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("profiling")
+
+
+@dataclass
+class StageTiming:
+    name: str
+    wall: float
+    cpu: float
+
+    @property
+    def wait(self) -> float:
+        # wall time not spent on the cpu by this thread, i.e. mostly network wait
+        return max(self.wall - self.cpu, 0.0)
+
+
+class StackSampler:
+    """
+    Statistical profiler, a background thread periodically grabs the stack of the
+    profiled thread and counts identical stacks. Frames are labelled per function,
+    not per line, so that labels can be cached per code object. Every sample holds
+    the GIL while walking the stack, measure the overhead before raising the rate.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.02):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        # drain swaps the counter from the profiled thread while this one counts
+        self.lock = threading.Lock()
+        self.labels: Dict[CodeType, str] = {}
+        self.stage: Optional[str] = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            stage = self.stage
+            # only sample inside stages, not while sleeping between cycles
+            if stage is None:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if frames:
+                stack = ";".join([stage] + frames[::-1])
+                with self.lock:
+                    self.samples[stack] += 1
+
+    def _label(self, code: CodeType) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def drain(self) -> Counter:
+        with self.lock:
+            samples, self.samples = self.samples, Counter()
+        return samples
+
+
+class CycleProfiler:
+    """
+    Records wall and cpu time per stage of a cycle and, if sampling is on, stack
+    samples tagged with the running stage. Each cycle is appended in collapsed
+    stack format (`frame;frame;frame count`, as read by flamegraph.pl, speedscope
+    and inferno) to a size rotated file. Can be switched on and off while running.
+    """
+
+    def __init__(
+        self,
+        path: str = "profile.folded",
+        max_bytes: int = 10_000_000,
+        backup_count: int = 3,
+        sample_interval: float = 0.02,
+    ):
+        self.enabled = False
+        self.sampling = False
+        self.sample_interval = sample_interval
+        self.sampler: Optional[StackSampler] = None
+        self.timings: List[StageTiming] = []
+        self.thread_id = threading.get_ident()
+
+        self.output = logging.getLogger(f"profiling.{path}")
+        self.output.propagate = False
+        if not self.output.handlers:
+            handler = RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.output.addHandler(handler)
+        self.output.setLevel(logging.INFO)
+
+    def configure(self, enabled: bool, sampling: bool = False) -> None:
+        if enabled != self.enabled:
+            logger.info(f"- profiling {'enabled' if enabled else 'disabled'}")
+        self.enabled = enabled
+        sampling = enabled and sampling
+        if sampling and self.sampler is None:
+            self.sampler = StackSampler(self.thread_id, self.sample_interval)
+            self.sampler.start()
+        elif not sampling and self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+        self.sampling = sampling
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        if self.sampler is not None:
+            self.sampler.stage = name
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.timings.append(
+                StageTiming(
+                    name,
+                    time.perf_counter() - wall_start,
+                    time.thread_time() - cpu_start,
+                )
+            )
+            if self.sampler is not None:
+                self.sampler.stage = None
+
+    def end_cycle(self) -> Dict[str, StageTiming]:
+        timings, self.timings = self.timings, []
+        # drained every cycle, so samples never end up in a later cycle's output
+        samples = self.sampler.drain() if self.sampler is not None else Counter()
+        if not self.enabled or not timings:
+            return {}
+
+        # stages are summed by name, in case one is entered more than once a cycle
+        totals: Dict[str, StageTiming] = {}
+        for timing in timings:
+            total = totals.setdefault(timing.name, StageTiming(timing.name, 0.0, 0.0))
+            total.wall += timing.wall
+            total.cpu += timing.cpu
+
+        lines = []
+        for total in totals.values():
+            lines.append(f"cycle;{total.name};cpu {int(total.cpu * 1_000_000)}")
+            lines.append(f"cycle;{total.name};wait {int(total.wait * 1_000_000)}")
+        # samples weighted by the interval, so both trees are in microseconds
+        lines.extend(
+            f"samples;{stack} {int(count * self.sample_interval * 1_000_000)}"
+            for stack, count in samples.items()
+        )
+        self.output.info("\n".join(lines))
+
+        logger.info(
+            "- profile: "
+            + ", ".join(
+                f"{total.name} wall {total.wall * 1000:.1f}ms cpu {total.cpu * 1000:.1f}ms"
+                for total in totals.values()
+            )
+        )
+        return totals
@@ -0,0 +1,64 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed capacity buffer backed by a numpy array, appending overwrites the oldest
+    value once full, so memory stays bounded no matter how long it runs.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=dtype)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def full(self) -> bool:
+        return self.size == self.capacity
+
+    def append(self, value) -> Optional[object]:
+        # returns the evicted value, if any, so callers can keep running sums
+        end = (self.start + self.size) % self.capacity
+        if self.full():
+            evicted = self._item(self.start)
+            self.buffer[end] = value
+            self.start = (self.start + 1) % self.capacity
+            return evicted
+        self.buffer[end] = value
+        self.size += 1
+        return None
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("ring buffer index out of range")
+        return self._item((self.start + index) % self.capacity)
+
+    def _item(self, position: int):
+        # plain python values out, also for object arrays which hold them already
+        value = self.buffer[position]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def last(self):
+        return self[-1]
+
+    def segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        # oldest first as two views without copying, the second one may be empty
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.buffer[self.start : end], self.buffer[:0]
+        return self.buffer[self.start :], self.buffer[: end - self.capacity]
+
+    def values(self) -> np.ndarray:
+        # oldest first, copies so that the result is contiguous
+        return np.concatenate(self.segments())
+
+    def clear(self) -> None:
+        self.start = 0
+        self.size = 0
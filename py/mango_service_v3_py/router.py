@@ -0,0 +1,239 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import httpx
+
+from mango_service_v3_py.api import MangoServiceV3Client
+from mango_service_v3_py.dtos import (
+    Balance,
+    Candle,
+    Market,
+    Order,
+    Orderbook,
+    PlaceOrder,
+    Position,
+    Trade,
+)
+
+logger = logging.getLogger("router")
+
+T = TypeVar("T")
+
+
+class NoHealthyBackendError(Exception):
+    pass
+
+
+@dataclass
+class Backend:
+    account: str
+    client: MangoServiceV3Client
+    # exponentially weighted moving average of request latency in seconds
+    latency: Optional[float] = None
+    sampled_at: float = 0.0
+    unhealthy_until: float = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+
+class MangoServiceV3Router:
+    """
+    Routes requests over several service instances, each serving one mango account.
+
+    Market data reads go to the fastest healthy instance, failing over to the next
+    one; account reads and writes are pinned to the instances of the owning account;
+    aggregate queries fan out to one instance per account concurrently.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        latency_alpha: float = 0.2,
+        unhealthy_cooldown: float = 30.0,
+        max_sample_age: float = 60.0,
+        max_workers: int = 8,
+    ):
+        self.backends = backends
+        self.latency_alpha = latency_alpha
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self.max_sample_age = max_sample_age
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def accounts(self) -> List[str]:
+        return list(dict.fromkeys(backend.account for backend in self.backends))
+
+    def _ranked(self, backends: List[Backend]) -> List[Backend]:
+        now = time.monotonic()
+        healthy = [backend for backend in backends if backend.healthy(now)]
+
+        # backends without a recent latency sample are tried first so they get
+        # (re-)measured, otherwise one slow first request would rule a backend out
+        def key(backend: Backend) -> float:
+            if (
+                backend.latency is None
+                or now - backend.sampled_at > self.max_sample_age
+            ):
+                return -1.0
+            return backend.latency
+
+        ranked = sorted(healthy, key=key)
+        if ranked:
+            return ranked
+        # everything is in cooldown, rather try than fail outright
+        return sorted(backends, key=lambda backend: backend.unhealthy_until)
+
+    def _call(
+        self,
+        backends: List[Backend],
+        request: Callable[[MangoServiceV3Client], T],
+        failover: bool = True,
+    ) -> T:
+        last_error = None
+        ranked = self._ranked(backends)
+        # a write which timed out may still have landed, never replay it elsewhere
+        for backend in ranked if failover else ranked[:1]:
+            start = time.monotonic()
+            try:
+                result = request(backend.client)
+            except Exception as e:
+                # errors of the request itself, e.g. a 400 for an unknown market or
+                # an unexpected body, say nothing about the backend, don't fail over
+                if not self._is_backend_error(e):
+                    raise
+                logger.warning(
+                    f"request to {backend.client.BASE_URL} ({backend.account}) failed: {e}"
+                )
+                backend.unhealthy_until = time.monotonic() + self.unhealthy_cooldown
+                # forget the sample, the backend is re-measured once it is back
+                backend.latency = None
+                last_error = e
+                continue
+            now = time.monotonic()
+            elapsed = now - start
+            # a stale average is replaced rather than blended with the new sample
+            stale = now - backend.sampled_at > self.max_sample_age
+            backend.latency = (
+                elapsed
+                if backend.latency is None or stale
+                else self.latency_alpha * elapsed
+                + (1 - self.latency_alpha) * backend.latency
+            )
+            backend.sampled_at = now
+            return result
+        raise NoHealthyBackendError(
+            f"no backend could serve the request, last error: {last_error}"
+        )
+
+    @staticmethod
+    def _is_backend_error(error: Exception) -> bool:
+        if isinstance(error, httpx.TransportError):
+            return True
+        return (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code >= 500
+        )
+
+    def _read(self, request: Callable[[MangoServiceV3Client], T]) -> T:
+        return self._call(self.backends, request)
+
+    def _for_account(
+        self,
+        account: str,
+        request: Callable[[MangoServiceV3Client], T],
+        failover: bool = True,
+    ) -> T:
+        backends = [backend for backend in self.backends if backend.account == account]
+        if not backends:
+            raise NoHealthyBackendError(f"no backend for account {account}")
+        return self._call(backends, request, failover)
+
+    def _write(self, account: str, request: Callable[[MangoServiceV3Client], T]) -> T:
+        return self._for_account(account, request, failover=False)
+
+    def _fan_out(self, request: Callable[[MangoServiceV3Client], T]) -> Dict[str, T]:
+        futures = {
+            account: self.executor.submit(self._for_account, account, request)
+            for account in self.accounts
+        }
+        return {account: future.result() for account, future in futures.items()}
+
+    # market data, served by any instance
+
+    def get_markets(self) -> List[Market]:
+        return self._read(lambda client: client.get_markets())
+
+    def get_market_by_market_name(self, market_name: str) -> List[Market]:
+        return self._read(lambda client: client.get_market_by_market_name(market_name))
+
+    def get_orderbook(self, market_name: str, depth: int = 30) -> Orderbook:
+        return self._read(lambda client: client.get_orderbook(market_name, depth))
+
+    def get_trades(self, market_name: str) -> List[Trade]:
+        return self._read(lambda client: client.get_trades(market_name))
+
+    def get_candles(
+        self, market_name: str, resolution: int, start_time: int, end_time: int
+    ) -> List[Candle]:
+        return self._read(
+            lambda client: client.get_candles(
+                market_name, resolution, start_time, end_time
+            )
+        )
+
+    # account reads and writes, pinned to the owning account's instances
+
+    def get_open_positions(self, account: str) -> List[Position]:
+        return self._for_account(account, lambda client: client.get_open_positions())
+
+    def get_balances(self, account: str) -> List[Balance]:
+        return self._for_account(account, lambda client: client.get_balances())
+
+    def get_orders(self, account: str) -> List[Order]:
+        return self._for_account(account, lambda client: client.get_orders())
+
+    def get_orders_by_market_name(self, account: str, market_name: str) -> List[Order]:
+        return self._for_account(
+            account, lambda client: client.get_orders_by_market_name(market_name)
+        )
+
+    def place_order(self, account: str, order: PlaceOrder) -> None:
+        return self._write(account, lambda client: client.place_order(order))
+
+    def cancel_order_by_client_id(self, account: str, client_id):
+        return self._write(
+            account, lambda client: client.cancel_order_by_client_id(client_id)
+        )
+
+    def cancel_order_by_order_id(self, account: str, order_id):
+        return self._write(
+            account, lambda client: client.cancel_order_by_order_id(order_id)
+        )
+
+    def cancel_all_orders(self, account: str):
+        return self._write(account, lambda client: client.cancel_all_orders())
+
+    # aggregates over all accounts, fanned out concurrently
+
+    def get_all_open_positions(self) -> Dict[str, List[Position]]:
+        return self._fan_out(lambda client: client.get_open_positions())
+
+    def get_all_balances(self) -> Dict[str, List[Balance]]:
+        return self._fan_out(lambda client: client.get_balances())
+
+    def get_all_orders(self) -> Dict[str, List[Order]]:
+        return self._fan_out(lambda client: client.get_orders())
+
+    def get_total_usd_balance(self) -> float:
+        return sum(
+            balance.usd_value
+            for balances in self.get_all_balances().values()
+            for balance in balances
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,168 @@
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from mango_service_v3_py.dtos import Trade
+from mango_service_v3_py.ring_buffer import RingBuffer
+
+SIDES = {"buy": 1, "sell": -1}
+SIDE_NAMES = {side: name for name, side in SIDES.items()}
+
+
+def to_epoch_ns(time_: datetime) -> int:
+    # integer arithmetic, going through timestamp() floats loses sub microsecond bits
+    delta = time_ - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (
+        delta.days * 86_400 + delta.seconds
+    ) * 1_000_000_000 + delta.microseconds * 1_000
+
+
+class TradeTape:
+    """
+    Most recent trades of one market in columnar ring buffers, oldest first, with
+    int64 epoch nanosecond timestamps. Trades are de-duplicated by id, time, price
+    and size, so the same trades can be fed from both polling get_trades and a
+    stream. The id alone isn't enough, the service uses the order id as trade id so
+    all fills of one order share it. Memory is bounded by `capacity` regardless of
+    uptime.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.times = RingBuffer(capacity, np.int64)
+        self.prices = RingBuffer(capacity, np.float64)
+        self.sizes = RingBuffer(capacity, np.float64)
+        self.sides = RingBuffer(capacity, np.int8)
+        self.ids = RingBuffer(capacity, object)
+        # a count per key, a batch may hold several identical fills of one order
+        self.known_keys: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _append(self, time_ns: int, price: float, size: float, side: int, id_: str):
+        evicted_time = self.times.append(time_ns)
+        evicted_price = self.prices.append(price)
+        evicted_size = self.sizes.append(size)
+        self.sides.append(side)
+        evicted_id = self.ids.append(id_)
+        if evicted_id is not None:
+            evicted_key = (evicted_id, evicted_time, evicted_price, evicted_size)
+            self.known_keys[evicted_key] -= 1
+            if self.known_keys[evicted_key] <= 0:
+                del self.known_keys[evicted_key]
+        self.known_keys[(id_, int(time_ns), float(price), float(size))] += 1
+
+    def add_trades(self, trades: Iterable[Trade]) -> int:
+        new_trades = []
+        batch: Counter = Counter()
+        for trade in trades:
+            time_ns = to_epoch_ns(trade.time)
+            key = (trade.id, time_ns, trade.price, trade.size)
+            batch[key] += 1
+            # only the copies beyond those already on the tape are new
+            if batch[key] > self.known_keys[key]:
+                new_trades.append((time_ns, trade))
+        if not new_trades:
+            return 0
+        new_trades.sort(key=lambda item: item[0])
+
+        if len(self) and new_trades[0][0] < self.times.last():
+            # a late trade, e.g. polled after newer ones were streamed, rebuild in order
+            self._merge(new_trades)
+        else:
+            for time_ns, trade in new_trades:
+                self._append(
+                    time_ns, trade.price, trade.size, SIDES[trade.side], trade.id
+                )
+        return len(new_trades)
+
+    def add_trade(self, trade: Trade) -> bool:
+        return self.add_trades([trade]) == 1
+
+    def _merge(self, new_trades: List[Tuple[int, Trade]]) -> None:
+        times = np.concatenate(
+            (self.times.values(), [time_ns for time_ns, _ in new_trades])
+        )
+        prices = np.concatenate(
+            (self.prices.values(), [trade.price for _, trade in new_trades])
+        )
+        sizes = np.concatenate(
+            (self.sizes.values(), [trade.size for _, trade in new_trades])
+        )
+        sides = np.concatenate(
+            (self.sides.values(), [SIDES[trade.side] for _, trade in new_trades])
+        )
+        ids = np.concatenate(
+            (self.ids.values(), np.array([trade.id for _, trade in new_trades], object))
+        )
+        order = np.argsort(times, kind="stable")[-self.capacity :]
+
+        for buffer in (self.times, self.prices, self.sizes, self.sides, self.ids):
+            buffer.clear()
+        self.known_keys = Counter()
+        for i in order:
+            self._append(times[i], prices[i], sizes[i], sides[i], ids[i])
+
+    def _index(self, time_ns: int) -> int:
+        # index of the first trade at or after time_ns, bisecting both ring segments
+        first, second = self.times.segments()
+        if len(second) and len(first) and time_ns > first[-1]:
+            return len(first) + int(np.searchsorted(second, time_ns, side="left"))
+        return int(np.searchsorted(first, time_ns, side="left"))
+
+    def _slice(self, buffer: RingBuffer, start: int, end: int) -> np.ndarray:
+        first, second = buffer.segments()
+        if end <= len(first):
+            return first[start:end].copy()
+        if start >= len(first):
+            return second[start - len(first) : end - len(first)].copy()
+        return np.concatenate((first[start:], second[: end - len(first)]))
+
+    def window(
+        self, start_ns: int, end_ns: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        start = self._index(start_ns)
+        end = len(self) if end_ns is None else self._index(end_ns)
+        return {
+            "time": self._slice(self.times, start, end),
+            "price": self._slice(self.prices, start, end),
+            "size": self._slice(self.sizes, start, end),
+            "side": self._slice(self.sides, start, end),
+        }
+
+    def last_seconds(
+        self, seconds: float, now_ns: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        now_ns = time.time_ns() if now_ns is None else now_ns
+        return self.window(now_ns - int(seconds * 1_000_000_000))
+
+    def volume_by_side(
+        self, seconds: float, now_ns: Optional[int] = None
+    ) -> Dict[str, float]:
+        trades = self.last_seconds(seconds, now_ns)
+        return {
+            name: float(trades["size"][trades["side"] == side].sum())
+            for name, side in SIDES.items()
+        }
+
+    def recent_trades(
+        self, seconds: float, now_ns: Optional[int] = None
+    ) -> List[Trade]:
+        now_ns = time.time_ns() if now_ns is None else now_ns
+        start = self._index(now_ns - int(seconds * 1_000_000_000))
+        return [
+            Trade(
+                id=self.ids[i],
+                price=self.prices[i],
+                side=SIDE_NAMES[self.sides[i]],
+                size=self.sizes[i],
+                time=datetime.fromtimestamp(
+                    self.times[i] / 1_000_000_000, timezone.utc
+                ),
+            )
+            for i in range(start, len(self))
+        ]
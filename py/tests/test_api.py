@@ -0,0 +1,45 @@
+import httpx
+import pytest
+
+from mango_service_v3_py.api import MangoServiceV3Client
+
+
+@pytest.fixture
+def respond(monkeypatch):
+    def respond(status_code, text='{"success": true, "result": []}'):
+        def request(method):
+            def send(url, **kwargs):
+                return httpx.Response(
+                    status_code, text=text, request=httpx.Request(method, url)
+                )
+
+            return send
+
+        for method in ("get", "post", "delete"):
+            monkeypatch.setattr(httpx, method, request(method.upper()))
+
+    return respond
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda client: client.get_orders(),
+        lambda client: client.cancel_all_orders(),
+        lambda client: client.cancel_order_by_order_id(1),
+        lambda client: client.cancel_order_by_client_id("123"),
+    ],
+)
+@pytest.mark.parametrize("status_code", [400, 500])
+def test_errors_are_raised_with_the_status(respond, call, status_code):
+    respond(status_code)
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        call(MangoServiceV3Client())
+    assert error.value.response.status_code == status_code
+
+
+def test_success(respond):
+    respond(200)
+    client = MangoServiceV3Client()
+    assert client.get_orders() == []
+    assert client.cancel_all_orders() is None
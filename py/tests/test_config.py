@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from mango_service_v3_py.config import HotReloadConfig, InotifyWatcher, PollingWatcher
+
+
+class Parameters(BaseModel):
+    market: str = "BTC-PERP"
+    size: float = 1.0
+
+
+def write(path, params):
+    with open(path, "w") as f:
+        json.dump(params, f)
+
+
+def replace(path, params):
+    # write to a temp file and rename over the original, as editors and tools do
+    temp_path = f"{path}.tmp"
+    write(temp_path, params)
+    os.replace(temp_path, path)
+
+
+def later(seconds, action, *args):
+    timer = threading.Timer(seconds, action, args)
+    timer.start()
+    return timer
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "parameters.json")
+    write(path, {"market": "SOL-PERP", "size": 2.0})
+    return path
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def config(request, path, monkeypatch):
+    if request.param == "inotify":
+        if not sys.platform.startswith("linux"):
+            pytest.skip("inotify is linux only")
+    else:
+        monkeypatch.setattr(sys, "platform", "darwin")
+    config = HotReloadConfig(path, Parameters, poll_interval=0.01)
+    yield config
+    config.close()
+
+
+def test_watcher_type(config, request):
+    watcher_type = (
+        InotifyWatcher
+        if request.node.callspec.params["config"] == "inotify"
+        else PollingWatcher
+    )
+    assert isinstance(config.watcher, watcher_type)
+
+
+def test_loads_at_startup(config):
+    assert config.params == Parameters(market="SOL-PERP", size=2.0)
+
+
+def test_missing_file_at_startup_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        HotReloadConfig(str(tmp_path / "missing.json"), Parameters)
+
+
+def test_invalid_file_at_startup_raises(path):
+    write(path, {"size": "a lot"})
+    with pytest.raises(ValidationError):
+        HotReloadConfig(path, Parameters)
+    with open(path, "w") as f:
+        f.write("{")
+    with pytest.raises(ValueError):
+        HotReloadConfig(path, Parameters)
+
+
+def test_write_is_picked_up(config, path):
+    timer = later(0.05, write, path, {"market": "ETH-PERP"})
+    start = time.monotonic()
+    assert config.sleep(5)
+    timer.join()
+    assert time.monotonic() - start < 1
+    assert config.params == Parameters(market="ETH-PERP")
+    assert config.last_reload_latency is not None
+
+
+def test_atomic_rename_is_picked_up(config, path):
+    timer = later(0.05, replace, path, {"market": "ETH-PERP"})
+    assert config.sleep(5)
+    timer.join()
+    assert config.params.market == "ETH-PERP"
+
+
+def test_invalid_file_keeps_old_parameters(config, path):
+    params = config.params
+    timer = later(0.05, write, path, {"size": "a lot"})
+    assert not config.sleep(0.3)
+    timer.join()
+    assert config.params is params
+
+
+def test_sleep_without_changes_waits_the_full_time(config):
+    params = config.params
+    start = time.monotonic()
+    assert not config.sleep(0.2)
+    assert time.monotonic() - start >= 0.2
+    assert config.params is params
+
+
+def test_other_files_in_the_directory_are_ignored(config, path):
+    params = config.params
+    timer = later(0.05, write, os.path.join(os.path.dirname(path), "other.json"), {})
+    assert not config.sleep(0.3)
+    timer.join()
+    assert config.params is params
@@ -0,0 +1,193 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from mango_service_v3_py.dtos import Candle, Trade
+from mango_service_v3_py.indicators import (
+    ATR,
+    EMA,
+    VWAP,
+    CandleResampler,
+    IndicatorEngine,
+    RealizedVolatility,
+    RollingSum,
+    TradeBarBuilder,
+)
+
+
+def candle(time, close, high=None, low=None, open=None, volume=1.0):
+    return Candle(
+        time=time,
+        open=close if open is None else open,
+        high=close if high is None else high,
+        low=close if low is None else low,
+        close=close,
+        volume=volume,
+    )
+
+
+def trade(id_, seconds, price, size=1.0):
+    return Trade(
+        id=id_,
+        price=price,
+        side="buy",
+        size=size,
+        time=datetime.fromtimestamp(seconds, timezone.utc),
+    )
+
+
+def test_rolling_sum_matches_window_sum():
+    values = np.random.default_rng(1).normal(size=50)
+    rolling = RollingSum(7)
+    for i, value in enumerate(values):
+        total = rolling.update(value)
+        assert total == pytest.approx(values[max(0, i - 6) : i + 1].sum())
+    assert len(rolling) == 7
+
+
+def test_ema():
+    ema = EMA(3)
+    assert ema.update(10) == 10
+    assert ema.update(20) == 15
+    assert ema.update(20) == 17.5
+
+
+def test_atr_uses_previous_close():
+    atr = ATR(2)
+    assert atr.update(candle(0, 10, high=11, low=9)) == 2
+    # gap up, true range is high - previous close
+    assert atr.update(candle(60, 14, high=15, low=13)) == (2 + 5) / 2
+    assert atr.update(candle(120, 13, high=14, low=12)) == (5 + 2) / 2
+
+
+def test_realized_volatility_matches_numpy():
+    closes = [100, 101, 99, 102, 103, 101, 100]
+    volatility = RealizedVolatility(4)
+    assert volatility.update(candle(0, closes[0])) is None
+    for i, close in enumerate(closes[1:], 1):
+        value = volatility.update(candle(60 * i, close))
+    returns = np.diff(np.log(closes))[-4:]
+    assert value == pytest.approx(np.std(returns))
+
+
+def test_vwap():
+    vwap = VWAP(2)
+    assert vwap.update(candle(0, 10, volume=0)) is None
+    assert vwap.update(candle(60, 10, volume=1)) == 10
+    assert vwap.update(candle(120, 20, volume=3)) == pytest.approx(17.5)
+
+
+def test_resampler_aggregates_and_emits_on_next_bucket():
+    resampler = CandleResampler(300)
+    assert resampler.update(candle(0, 10, high=12, low=9, volume=1)) == []
+    assert resampler.update(candle(60, 11, high=13, low=8, volume=2)) == []
+    bars = resampler.update(candle(300, 12, volume=3))
+    assert bars == [Candle(time=0, open=10, high=13, low=8, close=11, volume=3)]
+    assert resampler.current == candle(300, 12, volume=3)
+
+
+def test_resampler_fills_empty_buckets_with_flat_bars():
+    resampler = CandleResampler(60)
+    resampler.update(candle(0, 10, open=9))
+    bars = resampler.update(candle(240, 20))
+    assert bars == [
+        candle(0, 10, open=9),
+        candle(60, 10, volume=0),
+        candle(120, 10, volume=0),
+        candle(180, 10, volume=0),
+    ]
+
+
+def test_resampler_ignores_late_candles():
+    resampler = CandleResampler(60)
+    resampler.update(candle(0, 10))
+    resampler.update(candle(60, 11))
+    assert resampler.update(candle(30, 50, high=50)) == []
+    assert resampler.current == candle(60, 11)
+
+
+def test_gaps_do_not_inflate_volatility():
+    engine = IndicatorEngine(resolution=60, volatility_window=10)
+    engine.update_candles([candle(0, 100), candle(60, 100), candle(600, 101)])
+    engine.update_candles([candle(660, 101)])
+    # the move from 100 to 101 is a single return among flat ones
+    returns = [0.0] * 9 + [np.log(101 / 100)]
+    assert engine.volatility.value == pytest.approx(np.std(returns))
+
+
+def test_trade_bars():
+    builder = TradeBarBuilder(60)
+    assert builder.update(trade("a", 0, 10, 1)) == []
+    assert builder.update(trade("b", 30, 12, 2)) == []
+    bars = builder.update(trade("c", 130, 11))
+    assert bars == [
+        Candle(time=0, open=10, high=12, low=10, close=12, volume=3),
+        Candle(time=60, open=12, high=12, low=12, close=12, volume=0),
+    ]
+
+
+def test_resampler_replaces_the_last_candle():
+    resampler = CandleResampler(300)
+    resampler.update(candle(0, 10, high=12, volume=1))
+    resampler.update(candle(60, 1, low=1, volume=1))
+    resampler.replace_last(candle(60, 5, high=11, low=4, volume=3))
+    assert resampler.current == Candle(
+        time=0, open=10, high=12, low=4, close=5, volume=4
+    )
+    # the first candle of a bucket
+    resampler.update(candle(300, 7))
+    resampler.replace_last(candle(300, 8, open=7))
+    assert resampler.current == candle(300, 8, open=7)
+
+
+def test_engine_applies_only_new_trades():
+    engine = IndicatorEngine(resolution=60)
+    trades = [trade("a", 0, 10), trade("b", 30, 12)]
+    engine.update_trades(trades)
+    # polled again with an overlap, "a" and "b" must not be counted twice
+    engine.update_trades(trades + [trade("c", 60, 11)])
+    engine.update_trades([trade("c", 60, 11), trade("d", 120, 11)])
+    assert engine.last_minute == 60
+    assert engine.ema.value == 12
+    assert engine.vwap.volume.sum == 2
+    assert engine.resampler.current == candle(60, 11)
+
+
+def test_engine_applies_every_fill_of_an_order_once():
+    # the service uses the order id as trade id, so fills of one order share it
+    engine = IndicatorEngine(resolution=60)
+    trades = [trade("a", 0, 10), trade("x", 10, 11), trade("x", 20, 12)]
+    engine.update_trades(trades)
+    engine.update_trades(trades)
+    assert engine.trade_bars.resampler.current.volume == 3
+
+
+def test_engine_applies_identical_fills_at_the_same_time():
+    engine = IndicatorEngine(resolution=60)
+    fills = [trade("x", 10, 11), trade("x", 10, 11)]
+    engine.update_trades(fills)
+    engine.update_trades(fills)
+    assert engine.trade_bars.resampler.current.volume == 2
+    # a third fill in the same second shows up in the next poll
+    engine.update_trades(fills + [trade("x", 10, 11)])
+    assert engine.trade_bars.resampler.current.volume == 3
+
+
+def test_engine_replaces_the_minute_in_progress():
+    engine = IndicatorEngine(resolution=60)
+    engine.update_candles([candle(0, 10), candle(60, 1)])
+    # polled again, minute 60 is complete now and minute 120 in progress
+    engine.update_candles([candle(0, 10), candle(60, 5), candle(120, 7)])
+    expected = EMA(20)
+    expected.update(10)
+    assert engine.ema.value == expected.update(5)
+
+
+def test_engine_skips_older_minutes_already_seen():
+    engine = IndicatorEngine(resolution=60)
+    engine.update_candles([candle(0, 10), candle(60, 11)])
+    engine.update_candles([candle(0, 50), candle(120, 12)])
+    expected = EMA(20)
+    expected.update(10)
+    assert engine.ema.value == expected.update(11)
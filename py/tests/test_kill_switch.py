@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mango_service_v3_py.api import MangoServiceV3Client
+from mango_service_v3_py.kill_switch import KillSwitch
+
+
+def order(id_, market="BTC-PERP"):
+    return {
+        "future": market,
+        "id": id_,
+        "market": market,
+        "price": 100.0,
+        "side": "buy",
+        "size": 1.0,
+    }
+
+
+class FakeService:
+    """
+    Minimal stand-in for the service's /orders endpoints, with knobs for the ways
+    a bulk cancel can go wrong.
+    """
+
+    def __init__(self, orders):
+        self.orders = {order_["id"]: order_ for order_ in orders}
+        self.bulk_status = 200
+        # ids which survive a successful bulk cancel
+        self.survivors = set()
+        # /orders answers 500 until this time
+        self.orders_fail_until = 0.0
+        self.malformed_orders = False
+        self.requests = []
+        self.lock = threading.Lock()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                status, body = service.get(self.path)
+                self.reply(status, body)
+
+            def do_DELETE(self):
+                status, body = service.delete(self.path)
+                self.reply(status, body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+
+    def get(self, path):
+        with self.lock:
+            self.requests.append(("GET", path))
+            if path == "/api/coins":
+                return 200, json.dumps({"success": True, "result": []})
+            if time.monotonic() < self.orders_fail_until:
+                return 500, json.dumps({"success": False})
+            if self.malformed_orders:
+                return 200, "<html>bad gateway</html>"
+            orders = list(self.orders.values())
+            return 200, json.dumps({"success": True, "result": orders})
+
+    def delete(self, path):
+        with self.lock:
+            self.requests.append(("DELETE", path))
+            if path == "/api/orders":
+                if self.bulk_status >= 300:
+                    return self.bulk_status, json.dumps({"success": False})
+                self.orders = {
+                    id_: order_
+                    for id_, order_ in self.orders.items()
+                    if id_ in self.survivors
+                }
+                return self.bulk_status, json.dumps({"success": True})
+            self.orders.pop(int(path.rsplit("/", 1)[1]), None)
+            return 200, json.dumps({"success": True})
+
+    def per_order_cancels(self):
+        return [
+            path
+            for method, path in self.requests
+            if method == "DELETE" and path != "/api/orders"
+        ]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def service():
+    service = FakeService([order(1), order(2, "SOL-PERP"), order(9, "SOL-PERP")])
+    yield service
+    service.close()
+
+
+def kill_switch(service, max_duration=2.0):
+    return KillSwitch(
+        MangoServiceV3Client(service.base_url, timeout=1.0),
+        max_duration=max_duration,
+        poll_interval=0.05,
+        keep_warm_interval=None,
+    )
+
+
+def test_bulk_cancel_flattens(service):
+    switch = kill_switch(service)
+    result = switch.trigger()
+    switch.close()
+    assert result.flattened
+    assert not result.used_fallback
+    assert service.orders == {}
+    assert service.per_order_cancels() == []
+
+
+def test_warm_up_pings_before_trigger(service):
+    switch = kill_switch(service)
+    switch.close()
+    assert service.requests.count(("GET", "/api/coins")) == switch.warm_connections
+
+
+def test_bulk_cancel_failure_falls_back_per_market(service):
+    service.bulk_status = 500
+    switch = kill_switch(service)
+    result = switch.trigger()
+    switch.close()
+    assert result.flattened
+    assert result.used_fallback
+    assert service.orders == {}
+    assert sorted(service.per_order_cancels()) == [
+        "/api/orders/1",
+        "/api/orders/2",
+        "/api/orders/9",
+    ]
+
+
+def test_orders_surviving_bulk_cancel_are_cancelled_by_id(service):
+    service.bulk_status = 202
+    service.survivors = {9}
+    switch = kill_switch(service)
+    result = switch.trigger()
+    switch.close()
+    assert result.flattened
+    assert result.used_fallback
+    assert service.per_order_cancels() == ["/api/orders/9"]
+
+
+def test_unknown_state_after_bulk_cancel_uses_the_whole_budget(service):
+    # /orders can't be fetched until after the bulk cancel's half of the budget
+    service.bulk_status = 202
+    service.survivors = {9}
+    switch = kill_switch(service, max_duration=2.0)
+    service.orders_fail_until = time.monotonic() + 1.25
+    result = switch.trigger()
+    switch.close()
+    assert result.flattened
+    assert result.used_fallback
+    assert result.elapsed < 2.0
+    assert service.per_order_cancels() == ["/api/orders/9"]
+
+
+def test_malformed_orders_are_unknown_not_flat(service):
+    service.bulk_status = 500
+    service.malformed_orders = True
+    switch = kill_switch(service, max_duration=0.5)
+    result = switch.trigger()
+    switch.close()
+    assert not result.flattened
+    assert not result.used_fallback
+    assert result.remaining_orders == []
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from mango_service_v3_py.dtos import Candle
+from mango_service_v3_py.ladder import (
+    ConstantSize,
+    GeometricSize,
+    GeometricSpacing,
+    LinearSize,
+    LinearSpacing,
+    VolatilitySpacing,
+    generate_ladders,
+    realized_volatility,
+    snap,
+)
+
+
+def on_grid(values, increment):
+    ticks = np.asarray(values) / increment
+    return np.allclose(ticks, np.round(ticks), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize(
+    "values, increment, expected",
+    [
+        ([10.25, 12.5, 7.5], 0.25, [10.25, 12.5, 7.5]),
+        ([10.3, 10.37], 0.25, [10.25, 10.25]),
+        ([12.5, 7.5], 2.5, [12.5, 7.5]),
+        ([0.0375], 0.0025, [0.0375]),
+        ([0.1 + 0.2], 0.1, [0.3]),
+        ([49999.4], 1, [49999]),
+    ],
+)
+def test_snap_non_power_of_ten_increments(values, increment, expected):
+    snapped = snap(np.array([values]), np.array([increment]))
+    assert snapped[0].tolist() == expected
+    assert on_grid(snapped, increment)
+
+
+def test_snap_per_market_increments():
+    snapped = snap(np.array([[10.3, 10.6], [0.0376, 0.0401]]), np.array([0.25, 0.0025]))
+    assert snapped.tolist() == [[10.25, 10.5], [0.0375, 0.04]]
+
+
+@pytest.mark.parametrize(
+    "spacing",
+    [
+        GeometricSpacing(0.0001),
+        LinearSpacing(0.01),
+        VolatilitySpacing(0.00001, 1.0),
+    ],
+)
+def test_levels_are_at_least_one_tick_apart(spacing):
+    ladder = generate_ladders(
+        ["BTC-PERP"], [100.0], [101.0], [0.25], [0.01], spacing, ConstantSize(1), 4, 4
+    )
+    assert ladder.bid_prices.tolist() == [[100.0, 99.75, 99.5, 99.25]]
+    assert ladder.ask_prices.tolist() == [[101.0, 101.25, 101.5, 101.75]]
+
+
+def test_wide_spacing_is_kept_and_snapped():
+    ladder = generate_ladders(
+        ["BTC-PERP", "SOL-PERP"],
+        [100.0, 20.0],
+        [101.0, 20.5],
+        [0.25, 0.0025],
+        [0.01, 0.1],
+        LinearSpacing([1.1, 0.0123]),
+        ConstantSize(1),
+        3,
+        3,
+    )
+    assert ladder.bid_prices[0].tolist() == [100.0, 99.0, 97.75]
+    assert ladder.ask_prices[0].tolist() == [101.0, 102.0, 103.25]
+    assert on_grid(ladder.bid_prices[1], 0.0025)
+    assert on_grid(ladder.ask_prices[1], 0.0025)
+    assert np.all(np.diff(ladder.ask_prices, axis=1) > 0)
+    assert np.all(np.diff(ladder.bid_prices, axis=1) < 0)
+
+
+def test_size_curves():
+    assert ConstantSize(2).sizes(2, 3).tolist() == [[2, 2, 2], [2, 2, 2]]
+    assert LinearSize([1, 2]).sizes(2, 3).tolist() == [[1, 2, 3], [2, 4, 6]]
+    assert GeometricSize(1, 2).sizes(1, 4).tolist() == [[1, 2, 4, 8]]
+
+
+def test_sizes_below_increment_are_not_quoted():
+    ladder = generate_ladders(
+        ["BTC-PERP"],
+        [100.0],
+        [101.0],
+        [0.25],
+        [0.001],
+        GeometricSpacing(0.01),
+        GeometricSize(0.004, 0.1),
+        2,
+        2,
+    )
+    assert ladder.orders("BTC-PERP") == [
+        ("buy", 100.0, 0.004),
+        ("sell", 101.0, 0.004),
+    ]
+
+
+def test_realized_volatility():
+    closes = [100, 101, 99, 102]
+    candles = [
+        Candle(time=60 * i, open=c, high=c, low=c, close=c, volume=1)
+        for i, c in enumerate(closes)
+    ]
+    assert realized_volatility(candles) == pytest.approx(
+        np.std(np.diff(np.log(closes)))
+    )
+    assert realized_volatility(candles[:1]) == 0.0
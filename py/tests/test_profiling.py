@@ -0,0 +1,128 @@
+import re
+import threading
+import time
+
+import pytest
+
+from mango_service_v3_py.profiling import CycleProfiler, StackSampler, StageTiming
+
+# frames contain spaces, the count follows the last one
+LINE = re.compile(r"^(cycle|samples);.+ \d+$")
+
+
+def busy(seconds):
+    start = time.thread_time()
+    while time.thread_time() - start < seconds:
+        pass
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = CycleProfiler(str(tmp_path / "profile.folded"), sample_interval=0.005)
+    yield profiler
+    profiler.configure(False)
+    for handler in profiler.output.handlers:
+        handler.close()
+        profiler.output.removeHandler(handler)
+
+
+def output(profiler):
+    profiler.output.handlers[0].flush()
+    with open(profiler.output.handlers[0].baseFilename) as f:
+        return f.read().splitlines()
+
+
+def test_wait_is_wall_time_off_the_cpu():
+    assert StageTiming("fetch", wall=0.3, cpu=0.1).wait == pytest.approx(0.2)
+    assert StageTiming("fetch", wall=0.1, cpu=0.1000001).wait == 0.0
+
+
+def test_disabled_records_nothing(profiler):
+    with profiler.stage("fetch"):
+        pass
+    assert profiler.end_cycle() == {}
+    assert profiler.timings == []
+
+
+def test_stage_accounting(profiler):
+    profiler.configure(True)
+    with profiler.stage("fetch"):
+        time.sleep(0.1)
+    with profiler.stage("compute"):
+        busy(0.1)
+    with profiler.stage("compute"):
+        busy(0.05)
+    totals = profiler.end_cycle()
+
+    assert list(totals) == ["fetch", "compute"]
+    assert totals["fetch"].wall >= 0.1
+    assert totals["fetch"].cpu < 0.05
+    assert totals["fetch"].wait >= 0.05
+    # stages entered more than once a cycle are summed
+    assert totals["compute"].cpu >= 0.15
+    assert totals["compute"].wait < totals["compute"].cpu
+    assert profiler.end_cycle() == {}
+
+
+def test_collapsed_stack_output(profiler):
+    profiler.configure(True, sampling=True)
+    with profiler.stage("compute"):
+        busy(0.2)
+    totals = profiler.end_cycle()
+
+    lines = output(profiler)
+    assert all(LINE.match(line) for line in lines), lines
+    cpu = int(totals["compute"].cpu * 1_000_000)
+    assert f"cycle;compute;cpu {cpu}" in lines
+    samples = [line for line in lines if line.startswith("samples;compute;")]
+    assert samples
+    assert any("busy (" in line for line in samples)
+    # samples are weighted by the interval, in microseconds like the timings
+    assert all(int(line.rsplit(" ", 1)[1]) % 5000 == 0 for line in samples)
+
+
+def test_samples_are_drained_every_cycle(profiler):
+    profiler.configure(True, sampling=True)
+    profiler.sampler.samples["compute;stale"] += 1
+    # a cycle without stage timings still drops its samples
+    assert profiler.end_cycle() == {}
+    with profiler.stage("compute"):
+        pass
+    profiler.end_cycle()
+    assert not any("stale" in line for line in output(profiler))
+
+
+def test_configure_starts_and_stops_the_sampler(profiler):
+    profiler.configure(True)
+    assert profiler.enabled
+    assert profiler.sampler is None
+
+    profiler.configure(True, sampling=True)
+    sampler = profiler.sampler
+    assert sampler is not None and sampler.thread.is_alive()
+    # configuring again keeps the running sampler
+    profiler.configure(True, sampling=True)
+    assert profiler.sampler is sampler
+
+    profiler.configure(True, sampling=False)
+    assert profiler.sampler is None
+    assert not sampler.thread.is_alive()
+
+    # sampling needs profiling enabled
+    profiler.configure(False, sampling=True)
+    assert not profiler.enabled
+    assert profiler.sampler is None
+
+
+def test_sampler_only_samples_inside_stages():
+    sampler = StackSampler(threading.get_ident(), interval=0.005)
+    sampler.start()
+    busy(0.05)
+    sampler.stage = "compute"
+    busy(0.05)
+    sampler.stage = None
+    sampler.stop()
+    samples = sampler.drain()
+    assert samples
+    assert all(stack.startswith("compute;") for stack in samples)
+    assert sampler.drain() == {}
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from mango_service_v3_py.ring_buffer import RingBuffer
+
+
+def test_append_until_full():
+    buffer = RingBuffer(3)
+    assert buffer.append(1.0) is None
+    assert buffer.append(2.0) is None
+    assert not buffer.full()
+    assert buffer.append(3.0) is None
+    assert buffer.full()
+    assert len(buffer) == 3
+    assert buffer.values().tolist() == [1.0, 2.0, 3.0]
+
+
+def test_append_wraps_and_returns_evicted():
+    buffer = RingBuffer(3)
+    evicted = [buffer.append(float(i)) for i in range(7)]
+    assert evicted == [None, None, None, 0.0, 1.0, 2.0, 3.0]
+    assert len(buffer) == 3
+    assert buffer.values().tolist() == [4.0, 5.0, 6.0]
+    assert [buffer[i] for i in range(3)] == [4.0, 5.0, 6.0]
+    assert buffer[-1] == buffer.last() == 6.0
+
+
+def test_segments_are_oldest_first_views():
+    buffer = RingBuffer(4, np.int64)
+    for i in range(3):
+        buffer.append(i)
+    first, second = buffer.segments()
+    assert first.tolist() == [0, 1, 2]
+    assert len(second) == 0
+
+    for i in range(3, 6):
+        buffer.append(i)
+    first, second = buffer.segments()
+    assert first.tolist() == [2, 3]
+    assert second.tolist() == [4, 5]
+    assert np.shares_memory(first, buffer.buffer)
+    assert np.shares_memory(second, buffer.buffer)
+
+
+def test_index_out_of_range():
+    buffer = RingBuffer(2)
+    buffer.append(1.0)
+    with pytest.raises(IndexError):
+        buffer[1]
+    with pytest.raises(IndexError):
+        buffer[-2]
+
+
+def test_items_are_plain_python_values():
+    buffer = RingBuffer(2, np.int8)
+    buffer.append(-1)
+    assert type(buffer[0]) is int
+
+    ids = RingBuffer(2, object)
+    ids.append("a")
+    ids.append("b")
+    assert ids.append("c") == "a"
+    assert ids.values().tolist() == ["b", "c"]
+
+
+def test_clear():
+    buffer = RingBuffer(2)
+    for i in range(3):
+        buffer.append(float(i))
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.append(9.0) is None
+    assert buffer.values().tolist() == [9.0]
@@ -0,0 +1,172 @@
+import time
+
+import httpx
+import pytest
+
+from mango_service_v3_py.router import (
+    Backend,
+    MangoServiceV3Router,
+    NoHealthyBackendError,
+)
+
+
+def status_error(status_code):
+    request = httpx.Request("GET", "http://service/api/markets")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(
+        f"status {status_code}", request=request, response=response
+    )
+
+
+class StubClient:
+    """
+    Stands in for MangoServiceV3Client, records calls and either returns `result`
+    or raises `error`.
+    """
+
+    def __init__(self, name, result=None, error=None, delay=0.0):
+        self.BASE_URL = f"http://{name}/api"
+        self.result = name if result is None else result
+        self.error = error
+        self.delay = delay
+        self.calls = []
+
+    def _call(self, method, *args):
+        self.calls.append((method, *args))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def get_markets(self):
+        return self._call("get_markets")
+
+    def get_orders(self):
+        return self._call("get_orders")
+
+    def get_balances(self):
+        return self._call("get_balances")
+
+    def place_order(self, order):
+        return self._call("place_order", order)
+
+    def cancel_order_by_order_id(self, order_id):
+        return self._call("cancel_order_by_order_id", order_id)
+
+
+def router(*backends, **kwargs):
+    return MangoServiceV3Router(list(backends), **kwargs)
+
+
+def test_fails_over_on_transport_errors_and_5xx():
+    down = Backend("a", StubClient("down", error=httpx.ConnectError("refused")))
+    broken = Backend("a", StubClient("broken", error=status_error(503)))
+    up = Backend("a", StubClient("up"))
+    assert router(down, broken, up).get_markets() == "up"
+    now = time.monotonic()
+    assert not down.healthy(now)
+    assert not broken.healthy(now)
+    assert up.healthy(now)
+    assert up.latency is not None
+
+
+def test_unhealthy_backends_are_skipped_until_cooldown():
+    down = Backend("a", StubClient("down", error=httpx.ConnectError("refused")))
+    up = Backend("a", StubClient("up"))
+    router_ = router(down, up, unhealthy_cooldown=30.0)
+    router_.get_markets()
+    router_.get_markets()
+    assert len(down.client.calls) == 1
+    assert len(up.client.calls) == 2
+
+
+def test_request_errors_are_raised_without_failover():
+    bad_request = Backend("a", StubClient("first", error=status_error(400)))
+    other = Backend("a", StubClient("other"))
+    with pytest.raises(httpx.HTTPStatusError):
+        router(bad_request, other).get_markets()
+    assert bad_request.healthy(time.monotonic())
+    assert other.client.calls == []
+
+
+def test_validation_errors_are_raised_without_failover():
+    malformed = Backend("a", StubClient("first", error=KeyError("result")))
+    other = Backend("a", StubClient("other"))
+    with pytest.raises(KeyError):
+        router(malformed, other).get_markets()
+    assert malformed.healthy(time.monotonic())
+    assert other.client.calls == []
+
+
+def test_all_backends_down():
+    down = Backend("a", StubClient("down", error=httpx.ConnectError("refused")))
+    with pytest.raises(NoHealthyBackendError):
+        router(down).get_markets()
+
+
+def test_fastest_backend_is_preferred():
+    slow = Backend("a", StubClient("slow"), latency=0.5, sampled_at=time.monotonic())
+    fast = Backend("a", StubClient("fast"), latency=0.01, sampled_at=time.monotonic())
+    assert router(slow, fast).get_markets() == "fast"
+
+
+def test_stale_samples_are_re_measured():
+    now = time.monotonic()
+    # measured as slow a long time ago, e.g. during a hiccup
+    recovered = Backend("a", StubClient("recovered"), latency=5.0, sampled_at=now - 120)
+    fast = Backend("a", StubClient("fast"), latency=0.01, sampled_at=now)
+    router_ = router(recovered, fast, max_sample_age=60.0)
+    assert router_.get_markets() == "recovered"
+    # the stale average is replaced, not blended with the new sample
+    assert recovered.latency < 1.0
+    assert recovered.sampled_at > now
+
+
+def test_failure_forgets_the_latency_sample():
+    backend = Backend(
+        "a",
+        StubClient("down", error=status_error(500)),
+        latency=0.01,
+        sampled_at=time.monotonic(),
+    )
+    with pytest.raises(NoHealthyBackendError):
+        router(backend).get_markets()
+    assert backend.latency is None
+
+
+def test_account_reads_are_pinned():
+    a = Backend("a", StubClient("a"))
+    b = Backend("b", StubClient("b"))
+    router_ = router(a, b)
+    assert router_.get_orders("b") == "b"
+    assert a.client.calls == []
+    with pytest.raises(NoHealthyBackendError):
+        router_.get_orders("c")
+
+
+def test_writes_are_pinned_and_never_replayed():
+    first = Backend("a", StubClient("first", error=httpx.ReadTimeout("timeout")))
+    second = Backend("a", StubClient("second"))
+    other_account = Backend("b", StubClient("other"))
+    with pytest.raises(NoHealthyBackendError):
+        router(first, second, other_account).cancel_order_by_order_id("a", 1)
+    assert first.client.calls == [("cancel_order_by_order_id", 1)]
+    assert second.client.calls == []
+    assert other_account.client.calls == []
+    # a backend failing writes is marked unhealthy like one failing reads
+    assert not first.healthy(time.monotonic())
+
+
+def test_rejected_writes_are_raised():
+    rejected = Backend("a", StubClient("rejected", error=status_error(400)))
+    with pytest.raises(httpx.HTTPStatusError):
+        router(rejected).place_order("a", "order")
+    assert rejected.healthy(time.monotonic())
+
+
+def test_fan_out_one_backend_per_account():
+    a = Backend("a", StubClient("a", result=["a"]))
+    b = Backend("b", StubClient("b", result=["b"]))
+    router_ = router(a, b)
+    assert router_.get_all_balances() == {"a": ["a"], "b": ["b"]}
+    router_.close()
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from mango_service_v3_py.dtos import Trade
+from mango_service_v3_py.trade_tape import TradeTape, to_epoch_ns
+
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+START_NS = to_epoch_ns(START)
+SECOND = 1_000_000_000
+
+
+def trade(seconds, price=100.0, size=1.0, side="buy", id_=None):
+    return Trade(
+        id=str(seconds) if id_ is None else id_,
+        price=price,
+        side=side,
+        size=size,
+        time=START + timedelta(seconds=seconds),
+    )
+
+
+def test_to_epoch_ns_keeps_microseconds():
+    time_ = datetime(2022, 1, 1, 0, 0, 0, 123456, tzinfo=timezone.utc)
+    assert to_epoch_ns(time_) == 1_640_995_200_123_456_000
+
+
+def known_ids(tape):
+    return {id_ for id_, _, _, _ in tape.known_keys}
+
+
+def test_duplicates_are_ignored():
+    tape = TradeTape(10)
+    assert tape.add_trades([trade(1), trade(2)]) == 2
+    assert tape.add_trades([trade(1), trade(2), trade(3)]) == 1
+    assert not tape.add_trade(trade(3))
+    assert tape.ids.values().tolist() == ["1", "2", "3"]
+
+
+def test_fills_of_one_order_are_kept():
+    # the service uses the order id as trade id, so fills of one order share it
+    tape = TradeTape(10)
+    fills = [
+        trade(1, price=100.0, size=1.0, id_="order"),
+        trade(1, price=100.5, size=2.0, id_="order"),
+        trade(2, price=100.5, size=3.0, id_="order"),
+    ]
+    assert tape.add_trades(fills) == 3
+    assert tape.add_trades(fills) == 0
+    assert tape.volume_by_side(10, START_NS + 2 * SECOND) == {"buy": 6.0, "sell": 0.0}
+    assert tape.recent_trades(10, START_NS + 2 * SECOND) == fills
+
+
+def test_identical_fills_are_counted():
+    tape = TradeTape(10)
+    fill = trade(1, id_="order")
+    assert tape.add_trades([fill, fill]) == 2
+    assert tape.add_trades([fill, fill]) == 0
+    assert tape.add_trades([fill, fill, fill]) == 1
+    assert len(tape) == 3
+
+
+def test_eviction_forgets_ids():
+    tape = TradeTape(3)
+    tape.add_trades([trade(i) for i in range(5)])
+    assert len(tape) == 3
+    assert known_ids(tape) == {"2", "3", "4"}
+    assert tape.ids.values().tolist() == ["2", "3", "4"]
+
+
+def test_late_trades_are_merged_in_order():
+    tape = TradeTape(10)
+    tape.add_trades([trade(1), trade(3), trade(5)])
+    assert tape.add_trades([trade(4), trade(2), trade(3)]) == 2
+    assert tape.ids.values().tolist() == ["1", "2", "3", "4", "5"]
+    assert np.all(np.diff(tape.times.values()) > 0)
+    assert known_ids(tape) == {"1", "2", "3", "4", "5"}
+
+
+def test_merge_keeps_the_newest_trades_when_full():
+    tape = TradeTape(4)
+    tape.add_trades([trade(i) for i in range(2, 8)])
+    tape.add_trades([trade(1), trade(6.5)])
+    assert len(tape) == 4
+    assert tape.ids.values().tolist() == ["5", "6", "6.5", "7"]
+    assert known_ids(tape) == {"5", "6", "6.5", "7"}
+
+
+def test_index_matches_searchsorted_after_wrap():
+    tape = TradeTape(8)
+    tape.add_trades([trade(i) for i in range(13)])
+    first, second = tape.times.segments()
+    assert len(first) and len(second)
+    times = tape.times.values()
+    for seconds in np.arange(-1, 15, 0.5):
+        time_ns = START_NS + int(seconds * SECOND)
+        assert tape._index(time_ns) == np.searchsorted(times, time_ns, side="left")
+
+
+def test_window_across_segments():
+    tape = TradeTape(8)
+    tape.add_trades([trade(i, price=float(i)) for i in range(13)])
+    window = tape.window(START_NS + 6 * SECOND, START_NS + 10 * SECOND)
+    assert window["price"].tolist() == [6.0, 7.0, 8.0, 9.0]
+    assert window["time"].tolist() == [START_NS + i * SECOND for i in range(6, 10)]
+
+
+def test_volume_by_side():
+    tape = TradeTape(10)
+    tape.add_trades(
+        [
+            trade(1, size=5, side="sell"),
+            trade(2, size=1, side="buy"),
+            trade(3, size=2, side="sell"),
+            trade(4, size=3, side="buy"),
+        ]
+    )
+    now_ns = START_NS + 4 * SECOND
+    assert tape.volume_by_side(2.5, now_ns) == {"buy": 4.0, "sell": 2.0}
+    assert tape.volume_by_side(10, now_ns) == {"buy": 4.0, "sell": 7.0}
+
+
+def test_recent_trades_round_trip():
+    tape = TradeTape(10)
+    trades = [trade(i, price=100.0 + i, side="sell") for i in range(4)]
+    tape.add_trades(trades)
+    recent = tape.recent_trades(1.5, START_NS + 3 * SECOND)
+    assert recent == trades[2:]